@@ -2,6 +2,7 @@
 import json
 import os
 import sys
+from pathlib import Path
 from typing import Any
 
 import requests
@@ -12,6 +13,27 @@ GH_TOKEN = os.environ["GH_DISPATCH_TOKEN"]
 # Optional guard. If set, commands from other chats are ignored.
 ALLOWED_CHAT_ID = os.environ.get("TELEGRAM_CHAT_ID", "").strip()
 
+# Next getUpdates offset; passing it to the following poll confirms everything before it.
+OFFSET_FILE = Path(os.environ.get("TG_OFFSET_FILE", Path.home() / ".cache" / "maudau" / "tg_offset"))
+POLL_TIMEOUT_SEC = 25
+
+# Static payloads, serialized once at import.
+KEYBOARD_JSON = json.dumps(
+    {
+        "inline_keyboard": [
+            [{"text": "Обновить MAUDAU", "callback_data": "run:maudau"}],
+            [{"text": "Обновить EPICENTER", "callback_data": "run:epicenter"}],
+            [{"text": "Обновить HOTLINE", "callback_data": "run_direct:hotline"}],
+            [{"text": "Обновить ROZETKA", "callback_data": "run_direct:rozetka_direct"}],
+        ]
+    },
+    ensure_ascii=False,
+)
+ALLOWED_UPDATES_JSON = json.dumps(["message", "callback_query"])
+
+# Keep-alive connection reused by all Telegram/GitHub calls in one run.
+SESSION = requests.Session()
+
 FEEDS = {
     "maudau": {
         "title": "MAUDAU",
@@ -43,7 +65,7 @@ DIRECT_FEEDS = {
 
 def tg_api(method: str, payload: dict[str, Any]) -> dict[str, Any]:
     url = f"https://api.telegram.org/bot{TG_TOKEN}/{method}"
-    resp = requests.post(url, data=payload, timeout=30)
+    resp = SESSION.post(url, data=payload, timeout=30)
     resp.raise_for_status()
     data = resp.json()
     if not data.get("ok"):
@@ -51,13 +73,28 @@ def tg_api(method: str, payload: dict[str, Any]) -> dict[str, Any]:
     return data
 
 
-def get_updates() -> list[dict[str, Any]]:
+def load_offset() -> int | None:
+    try:
+        return int(OFFSET_FILE.read_text(encoding="utf-8").strip())
+    except (OSError, ValueError):
+        return None
+
+
+def save_offset(offset: int) -> None:
+    OFFSET_FILE.parent.mkdir(parents=True, exist_ok=True)
+    OFFSET_FILE.write_text(str(offset), encoding="utf-8")
+
+
+def get_updates(offset: int | None) -> list[dict[str, Any]]:
     url = f"https://api.telegram.org/bot{TG_TOKEN}/getUpdates"
-    resp = requests.get(
-        url,
-        params={"timeout": 0, "allowed_updates": json.dumps(["message", "callback_query"])},
-        timeout=30,
-    )
+    params: dict[str, Any] = {
+        "timeout": POLL_TIMEOUT_SEC,
+        "allowed_updates": ALLOWED_UPDATES_JSON,
+    }
+    if offset is not None:
+        # Also confirms all updates with update_id < offset.
+        params["offset"] = offset
+    resp = SESSION.get(url, params=params, timeout=POLL_TIMEOUT_SEC + 10)
     resp.raise_for_status()
     data = resp.json()
     if not data.get("ok"):
@@ -68,17 +105,7 @@ def get_updates() -> list[dict[str, Any]]:
 def ack_updates(last_update_id: int) -> None:
     url = f"https://api.telegram.org/bot{TG_TOKEN}/getUpdates"
     # Confirms all updates with update_id <= last_update_id.
-    requests.get(url, params={"offset": last_update_id + 1, "timeout": 0}, timeout=30).raise_for_status()
-
-
-def keyboard() -> str:
-    buttons = [
-        [{"text": "Обновить MAUDAU", "callback_data": "run:maudau"}],
-        [{"text": "Обновить EPICENTER", "callback_data": "run:epicenter"}],
-        [{"text": "Обновить HOTLINE", "callback_data": "run_direct:hotline"}],
-        [{"text": "Обновить ROZETKA", "callback_data": "run_direct:rozetka_direct"}],
-    ]
-    return json.dumps({"inline_keyboard": buttons}, ensure_ascii=False)
+    SESSION.get(url, params={"offset": last_update_id + 1, "timeout": 0}, timeout=30).raise_for_status()
 
 
 def send_controls(chat_id: str) -> None:
@@ -87,7 +114,7 @@ def send_controls(chat_id: str) -> None:
         {
             "chat_id": chat_id,
             "text": "Выберите фид для обновления:",
-            "reply_markup": keyboard(),
+            "reply_markup": KEYBOARD_JSON,
         },
     )
 
@@ -110,7 +137,7 @@ def dispatch_workflow(feed_key: str) -> tuple[bool, str]:
         "Accept": "application/vnd.github+json",
     }
     body = {"ref": feed["ref"]}
-    resp = requests.post(url, headers=headers, json=body, timeout=30)
+    resp = SESSION.post(url, headers=headers, json=body, timeout=30)
 
     if resp.status_code == 204:
         return True, f"Запущено: {feed['title']}"
@@ -128,7 +155,7 @@ def trigger_direct_feed(feed_key: str) -> tuple[bool, str]:
         return False, "Неизвестная команда"
 
     try:
-        resp = requests.get(feed["url"], timeout=60)
+        resp = SESSION.get(feed["url"], timeout=60)
         if 200 <= resp.status_code < 300:
             return True, f"Запущено: {feed['title']}"
         return False, f"Ошибка запуска {feed['title']}: HTTP {resp.status_code}"
@@ -190,7 +217,7 @@ def process_callback(update: dict[str, Any]) -> None:
 
 def main() -> int:
     try:
-        updates = get_updates()
+        updates = get_updates(load_offset())
         if not updates:
             return 0
 
@@ -220,6 +247,9 @@ def main() -> int:
             elif "callback_query" in upd:
                 process_callback(upd)
 
+        save_offset(last_update_id + 1)
+        # The cached offset can be missing or stale on the next runner (eviction, failed save),
+        # so confirm on the server too; otherwise this batch would be dispatched again.
         ack_updates(last_update_id)
         return 0
     except Exception as exc:
@@ -6,12 +6,16 @@ import shutil
 import sys
 import time
 from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 from zoneinfo import ZoneInfo
 
 import requests
 from lxml import etree as ET
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 BASE_FEED_URL = "https://aqua-favorit.com.ua/content/export/b0026fd850ce11bb0cb7610e252d7dae.xml"
 ROZETKA_FEED_URL = "http://parser.biz.ua/Aqua/api/export.aspx?action=rozetka&key=ui82P2VotQQamFTj512NQJK3HOlKvyv7"
@@ -453,7 +457,8 @@ CATEGORY_ATTR_VALUE_OVERRIDES = {
 
 ALLOWED_VENDORS = {"мойдодыр", "dusel"}
 OLD_PRICE_TAGS = ("old_price", "oldprice", "price_old", "old", "priceold")
-ID_CLEAN_RE = re.compile(r"[^A-Za-z0-9]")
+# Offer ids keep only [A-Za-z0-9]; bytes.isalnum() is ASCII-only, so this is every other byte.
+ID_DROP_BYTES = bytes(c for c in range(256) if not bytes([c]).isalnum())
 HTML_TAG_RE = re.compile(r"<[^>]+>")
 CYRILLIC_RE = re.compile(r"[\u0400-\u04FF]")
 MULTISPACE_RE = re.compile(r"\s+")
@@ -463,6 +468,11 @@ RANGE_UPPER_RE = re.compile(r"^\s*(до)\s*(\d+(?:[.,]\d+)?)\s*([^\d]*)$", re.IG
 RANGE_LOWER_RE = re.compile(r"^\s*(более|понад|більше)\s*(\d+(?:[.,]\d+)?)\s*([^\d]*)$", re.IGNORECASE)
 SCALAR_WITH_UNIT_RE = re.compile(r"^\s*(\d+(?:[.,]\d+)?)\s*([^\d]*)$", re.IGNORECASE)
 MAX_DESC_LEN = 400
+# Source feeds are large and re-serialized compactly, so lift libxml2 size limits and drop blank text nodes.
+FEED_PARSER = ET.XMLParser(huge_tree=True, remove_blank_text=True)
+# Hot per-offer queries, compiled once for the whole run.
+FIND_PARAMS = ET.XPath("param")
+FIND_OFFERS = ET.XPath("//offer")
 
 # Generic value normalization hints (RU/UA forms and common endings).
 GENERIC_VALUE_SYNONYMS = {
@@ -513,6 +523,16 @@ load_local_env(LOCAL_ENV_FILE)
 TG_BOT_TOKEN = os.environ.get("TELEGRAM_BOT_TOKEN")
 TG_CHAT_ID = os.environ.get("TELEGRAM_CHAT_ID")
 
+# Shared keep-alive pool; transient gateway errors and connection failures are retried by urllib3.
+SESSION = requests.Session()
+_HTTP_ADAPTER = HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=4,
+    max_retries=Retry(total=5, backoff_factor=2, status_forcelist=[502, 503, 504]),
+)
+SESSION.mount("http://", _HTTP_ADAPTER)
+SESSION.mount("https://", _HTTP_ADAPTER)
+
 
 def send_telegram(message: str) -> None:
     if not TG_BOT_TOKEN or not TG_CHAT_ID:
@@ -521,25 +541,26 @@ def send_telegram(message: str) -> None:
     url = f"https://api.telegram.org/bot{TG_BOT_TOKEN}/sendMessage"
     payload = {"chat_id": TG_CHAT_ID, "text": message}
     try:
-        resp = requests.post(url, data=payload, timeout=20)
+        resp = SESSION.post(url, data=payload, timeout=20)
         resp.raise_for_status()
     except Exception as exc:
         print(f"⚠ Ошибка отправки в Telegram: {exc}")
 
 
-def download_file(url: str, path: Path, title: str, retries: int = 5, timeout: int = 180) -> None:
+def download_file(url: str, path: Path, title: str, retries: int = 3, timeout: int = 180) -> None:
     print(f"▶ Загрузка: {title}")
+    # The adapter retries only before the body starts; a broken stream or read timeout restarts the download here.
     for attempt in range(1, retries + 1):
         try:
-            r = requests.get(url, stream=True, timeout=timeout)
-            r.raise_for_status()
-            with open(path, "wb") as f:
-                for chunk in r.iter_content(1024 * 1024):
-                    if chunk:
-                        f.write(chunk)
+            with SESSION.get(url, stream=True, timeout=timeout) as r:
+                r.raise_for_status()
+                with open(path, "wb") as f:
+                    for chunk in r.iter_content(1024 * 1024):
+                        if chunk:
+                            f.write(chunk)
             print(f"✅ {title} загружен")
             return
-        except Exception as exc:
+        except requests.RequestException as exc:
             print(f"⚠ Ошибка загрузки ({title}) попытка {attempt}/{retries}: {exc}")
             if attempt == retries:
                 raise
@@ -552,7 +573,7 @@ def resolve_rozetka_backup_path() -> Path | None:
             continue
         if candidate.is_file() and candidate.stat().st_size > 0:
             try:
-                ET.parse(str(candidate))
+                ET.parse(str(candidate), FEED_PARSER)
             except Exception:
                 continue
             return candidate
@@ -565,7 +586,7 @@ def resolve_base_backup_path() -> Path | None:
             continue
         if candidate.is_file() and candidate.stat().st_size > 0:
             try:
-                ET.parse(str(candidate))
+                ET.parse(str(candidate), FEED_PARSER)
             except Exception:
                 continue
             return candidate
@@ -657,10 +678,15 @@ def normalize_text(value: str | None) -> str:
     return (value or "").strip()
 
 
+# Param names, vendors and tag labels repeat across every offer, so the cache hit rate is near 100%.
+@lru_cache(maxsize=4096)
 def normalize_key(value: str | None) -> str:
     return normalize_text(value).casefold()
 
 
+ARTICUL_KEY = normalize_key("Артикул")
+
+
 def build_source_category_names(root: ET._Element) -> dict[str, str]:
     items: dict[str, str] = {}
     parent_by_id: dict[str, str] = {}
@@ -715,18 +741,34 @@ def build_source_category_names(root: ET._Element) -> dict[str, str]:
     return result
 
 
+def index_children(offer: ET._Element) -> dict[str, list[ET._Element]]:
+    """Group offer children by tag in a single pass (comments and PIs are skipped)."""
+    by_tag: dict[str, list[ET._Element]] = {}
+    for child in offer:
+        if isinstance(child.tag, str):
+            by_tag.setdefault(child.tag, []).append(child)
+    return by_tag
+
+
 def child_text(offer: ET._Element, tag: str) -> str:
     node = offer.find(tag)
     return normalize_text(node.text if node is not None else "")
 
 
+def strip_html(value: str, repl: str = "") -> str:
+    # Most texts carry no markup; skip the regex engine when there is no tag opener at all.
+    if "<" not in value:
+        return value
+    return HTML_TAG_RE.sub(repl, value)
+
+
 def compact_text(value: str) -> str:
     return normalize_text(MULTISPACE_RE.sub(" ", value))
 
 
 def find_param_value(offer: ET._Element, param_name: str) -> str:
     target = normalize_key(param_name)
-    for param in offer.findall("param"):
+    for param in offer.iterchildren("param"):
         if normalize_key(param.get("name")) == target:
             value = normalize_text(param.text)
             if value:
@@ -740,8 +782,9 @@ def upsert_param(offer: ET._Element, param_name: str, value: str) -> bool:
     if not clean_name or not clean_value:
         return False
 
-    for param in offer.findall("param"):
-        if normalize_key(param.get("name")) == normalize_key(clean_name):
+    target = normalize_key(clean_name)
+    for param in offer.iterchildren("param"):
+        if normalize_key(param.get("name")) == target:
             if normalize_text(param.text) != clean_value:
                 param.text = clean_value
                 param.set("name", clean_name)
@@ -754,8 +797,17 @@ def upsert_param(offer: ET._Element, param_name: str, value: str) -> bool:
     return True
 
 
+def find_article(offer: ET._Element) -> str:
+    for param in offer.iterchildren("param"):
+        if (param.get("name") or "").strip().casefold() == ARTICUL_KEY:
+            value = normalize_text(param.text)
+            if value:
+                return value
+    return ""
+
+
 def resolve_offer_id_raw(offer: ET._Element) -> str:
-    article = find_param_value(offer, "Артикул")
+    article = find_article(offer)
     if article:
         return article
     vendor_code = child_text(offer, "vendorCode")
@@ -768,14 +820,6 @@ def resolve_offer_id_key(offer: ET._Element) -> str:
     return normalize_key(resolve_offer_id_raw(offer))
 
 
-def extract_old_price(offer: ET._Element) -> str:
-    for tag in OLD_PRICE_TAGS:
-        value = child_text(offer, tag)
-        if value:
-            return value
-    return ""
-
-
 def extract_available(offer: ET._Element) -> str:
     return normalize_text(offer.get("available"))
 
@@ -805,59 +849,6 @@ def set_available(offer: ET._Element, value: str) -> bool:
     return True
 
 
-def normalize_name_description(offer: ET._Element) -> None:
-    name = offer.find("name")
-    name_ru = offer.find("name_ru")
-    name_ua = offer.find("name_ua")
-
-    if name is not None and name_ru is None:
-        name_ru = ET.SubElement(offer, "name_ru")
-        name_ru.text = normalize_text(name.text)
-    if name is not None:
-        offer.remove(name)
-
-    if name_ru is not None:
-        name_ru.text = normalize_text(HTML_TAG_RE.sub("", name_ru.text or ""))[:255]
-    if name_ua is not None:
-        name_ua.text = normalize_text(HTML_TAG_RE.sub("", name_ua.text or ""))[:255]
-
-    desc = offer.find("description")
-    desc_ru = offer.find("description_ru")
-    desc_ua = offer.find("description_ua")
-
-    if desc is not None and desc_ru is None:
-        desc_ru = ET.SubElement(offer, "description_ru")
-        desc_ru.text = normalize_text(desc.text)
-    if desc is not None:
-        offer.remove(desc)
-
-    if desc_ru is not None:
-        desc_ru.text = compact_text(HTML_TAG_RE.sub(" ", desc_ru.text or ""))[:MAX_DESC_LEN]
-    if desc_ua is not None:
-        desc_ua.text = compact_text(HTML_TAG_RE.sub(" ", desc_ua.text or ""))[:MAX_DESC_LEN]
-
-
-def normalize_old_price(offer: ET._Element) -> None:
-    values = {}
-    for child in list(offer):
-        tag = child.tag
-        if tag in OLD_PRICE_TAGS:
-            value = normalize_text(child.text)
-            if value and tag not in values:
-                values[tag] = value
-            offer.remove(child)
-
-    old_value = ""
-    for tag in OLD_PRICE_TAGS:
-        if values.get(tag):
-            old_value = values[tag]
-            break
-
-    if old_value:
-        node = ET.SubElement(offer, "old_price")
-        node.text = old_value
-
-
 def enrich_vendor_country_from_params(offer: ET._Element) -> int:
     changed = 0
     brand = (
@@ -1858,40 +1849,130 @@ def apply_cross_rules(
     return out
 
 
-def cleanup_params(offer: ET._Element, target_category_id: str, merchant_catalog: dict[str, dict]) -> None:
-    category_meta = merchant_catalog.get(target_category_id, {})
-    attr_lookup = category_meta.get("attr_lookup", {})
-    attrs = category_meta.get("attrs", {})
+def clean_param(
+    p: ET._Element,
+    target_category_id: str,
+    attrs: dict[str, dict[str, str]],
+    attr_lookup: dict[str, str],
+    dedupe: set[tuple[str, str]],
+) -> bool:
+    pname = normalize_text(strip_html(p.get("name") or ""))
+    pval = compact_text(strip_html(p.text or "", " "))
 
-    dedupe: set[tuple[str, str]] = set()
-    for p in list(offer.findall("param")):
-        pname = normalize_text(HTML_TAG_RE.sub("", p.get("name") or ""))
-        pval = compact_text(HTML_TAG_RE.sub(" ", p.text or ""))
+    if not pname or not pval:
+        return False
 
-        if not pname or not pval:
-            offer.remove(p)
-            continue
+    mapped_name = map_param_name(pname, target_category_id)
+    canonical_name = attr_lookup.get(normalize_key(mapped_name), mapped_name)
+    if attrs and canonical_name not in attrs:
+        return False
+    p.set("name", canonical_name)
 
-        mapped_name = map_param_name(pname, target_category_id)
-        canonical_name = attr_lookup.get(normalize_key(mapped_name), mapped_name)
-        if attrs and canonical_name not in attrs:
-            offer.remove(p)
-            continue
-        p.set("name", canonical_name)
+    allowed_values = attrs.get(canonical_name, {})
+    normalized_value = apply_category_value_override(target_category_id, canonical_name, pval)
+    mapped_value = map_param_value_to_allowed(normalized_value, allowed_values)
+    if allowed_values and normalize_text_key(mapped_value) not in allowed_values:
+        return False
+    p.text = mapped_value
 
-        allowed_values = attrs.get(canonical_name, {})
-        normalized_value = apply_category_value_override(target_category_id, canonical_name, pval)
-        mapped_value = map_param_value_to_allowed(normalized_value, allowed_values)
-        if allowed_values and normalize_text_key(mapped_value) not in allowed_values:
-            offer.remove(p)
-            continue
-        p.text = mapped_value
+    dedupe_key = (normalize_key(canonical_name), normalize_key(p.text))
+    if dedupe_key in dedupe:
+        return False
+    dedupe.add(dedupe_key)
+    return True
+
+
+def _visit_source_text(child: ET._Element, state: dict) -> bool:
+    # Source-only name/description: replaced by name_ru/description_ru after the pass.
+    state["first"].setdefault(child.tag, child)
+    return False
 
-        dedupe_key = (normalize_key(canonical_name), normalize_key(p.text))
-        if dedupe_key in dedupe:
-            offer.remove(p)
-            continue
-        dedupe.add(dedupe_key)
+
+def _visit_name(child: ET._Element, state: dict) -> bool:
+    if child.tag not in state["first"]:
+        state["first"][child.tag] = child
+        child.text = normalize_text(strip_html(child.text or ""))[:255]
+    return True
+
+
+def _visit_description(child: ET._Element, state: dict) -> bool:
+    if child.tag not in state["first"]:
+        state["first"][child.tag] = child
+        child.text = compact_text(strip_html(child.text or "", " "))[:MAX_DESC_LEN]
+    return True
+
+
+def _visit_old_price(child: ET._Element, state: dict) -> bool:
+    value = normalize_text(child.text)
+    if value and child.tag not in state["old_prices"]:
+        state["old_prices"][child.tag] = value
+    return False
+
+
+def _visit_param(child: ET._Element, state: dict) -> bool:
+    return clean_param(child, state["target_category_id"], state["attrs"], state["attr_lookup"], state["dedupe"])
+
+
+# Child tag -> visitor returning whether the child is kept; tags without a visitor are kept as-is.
+CHILD_VISITORS = {
+    "name": _visit_source_text,
+    "description": _visit_source_text,
+    "name_ru": _visit_name,
+    "name_ua": _visit_name,
+    "description_ru": _visit_description,
+    "description_ua": _visit_description,
+    "param": _visit_param,
+    **{tag: _visit_old_price for tag in OLD_PRICE_TAGS},
+}
+
+
+def normalize_offer_children(
+    offer: ET._Element,
+    target_category_id: str,
+    merchant_catalog: dict[str, dict],
+) -> None:
+    """Normalize names, descriptions, old price and params in one pass over the offer children."""
+    category_meta = merchant_catalog.get(target_category_id, {})
+    state = {
+        "target_category_id": target_category_id,
+        "attrs": category_meta.get("attrs", {}),
+        "attr_lookup": category_meta.get("attr_lookup", {}),
+        "dedupe": set(),
+        "first": {},
+        "old_prices": {},
+    }
+
+    kept: list[ET._Element] = []
+    for child in offer:
+        visit = CHILD_VISITORS.get(child.tag)
+        if visit is None or visit(child, state):
+            kept.append(child)
+
+    first = state["first"]
+    old_prices = state["old_prices"]
+    name = first.get("name")
+    if name is not None and "name_ru" not in first:
+        name_ru = ET.Element("name_ru")
+        name_ru.text = normalize_text(strip_html(normalize_text(name.text)))[:255]
+        kept.append(name_ru)
+
+    desc = first.get("description")
+    if desc is not None and "description_ru" not in first:
+        desc_ru = ET.Element("description_ru")
+        desc_ru.text = compact_text(strip_html(normalize_text(desc.text), " "))[:MAX_DESC_LEN]
+        kept.append(desc_ru)
+
+    old_value = ""
+    for tag in OLD_PRICE_TAGS:
+        if old_prices.get(tag):
+            old_value = old_prices[tag]
+            break
+    if old_value:
+        node = ET.Element("old_price")
+        node.text = old_value
+        kept.append(node)
+
+    offer[:] = kept
 
 
 def apply_forced_category_params(
@@ -1921,36 +2002,38 @@ def apply_forced_category_params(
 
 
 def cleanup_pictures(offer: ET._Element) -> None:
-    pictures = [p for p in offer.findall("picture")]
-    kept = 0
-    for pic in pictures:
-        url = normalize_text(pic.text)
-        if not url or " " in url or len(url) > 255 or CYRILLIC_RE.search(url):
-            offer.remove(pic)
-            continue
-        pic.text = url
-        kept += 1
-        if kept > 12:
-            offer.remove(pic)
+    kept_children: list[ET._Element] = []
+    pictures = 0
+    for child in offer:
+        if child.tag == "picture":
+            url = normalize_text(child.text)
+            if not url or " " in url or len(url) > 255 or CYRILLIC_RE.search(url):
+                continue
+            pictures += 1
+            if pictures > 12:
+                continue
+            child.text = url
+        kept_children.append(child)
+    offer[:] = kept_children
 
 
 def normalize_offer_id(offer: ET._Element) -> bool:
     raw = resolve_offer_id_raw(offer)
-    clean = ID_CLEAN_RE.sub("", raw)
+    clean = raw.encode("ascii", "ignore").translate(None, ID_DROP_BYTES).decode("ascii")
     if not clean:
         return False
     offer.set("id", clean)
     return True
 
 
-def has_required_fields(offer: ET._Element) -> bool:
+def has_required_fields(by_tag: dict[str, list[ET._Element]]) -> bool:
     required_tags = ["name_ua", "name_ru", "description_ua", "description_ru", "price", "categoryId"]
     for tag in required_tags:
-        if not child_text(offer, tag):
+        node = by_tag.get(tag, [None])[0]
+        if node is None or not normalize_text(node.text):
             return False
 
-    pics = [p for p in offer.findall("picture") if normalize_text(p.text)]
-    return len(pics) > 0
+    return any(normalize_text(p.text) for p in by_tag.get("picture", ()))
 
 
 def resolve_target_category_id(offer: ET._Element, source_id: str) -> str:
@@ -2014,16 +2097,21 @@ def normalize_offer(
     brands_catalog: dict[str, str],
     countries_catalog: dict[str, str],
 ) -> bool:
-    normalize_name_description(offer)
-    normalize_old_price(offer)
+    # Hot path per offer. The work is str and lxml element manipulation, so it is sped up by keeping
+    # traversal in lxml's C code (iterchildren, precompiled XPath, single-pass child visits).
+    # Numba/Cython do not help here: they cannot compile str/Element code and would fall back to
+    # object mode, which is no faster than (and can regress versus) plain CPython.
+    # Vendor/country enrichment reads the raw source param names, so it runs before params are remapped.
     enrich_vendor_country_from_params(offer)
     normalize_vendor_by_catalog(offer, brands_catalog)
     normalize_country_by_catalog(offer, countries_catalog)
-    cleanup_params(offer, target_category_id, merchant_catalog)
+    normalize_offer_children(offer, target_category_id, merchant_catalog)
     cleanup_pictures(offer)
     offer.attrib.pop("group_id", None)
 
-    url_node = offer.find("url")
+    # Children were added/removed above; index once for the remaining lookups.
+    by_tag = index_children(offer)
+    url_node = by_tag.get("url", [None])[0]
     if url_node is not None:
         offer.remove(url_node)
 
@@ -2032,7 +2120,7 @@ def normalize_offer(
 
     set_available(offer, extract_available(offer))
 
-    return has_required_fields(offer)
+    return has_required_fields(by_tag)
 
 
 def ensure_root_date(root: ET._Element) -> None:
@@ -2044,7 +2132,7 @@ def ensure_unique_offer_ids(root: ET._Element) -> int:
     """Ensure all offer ids are unique and remain [A-Za-z0-9]."""
     used: set[str] = set()
     changed = 0
-    for offer in root.xpath("//offer"):
+    for offer in root.iter("offer"):
         base = normalize_text(offer.get("id"))
         if not base:
             continue
@@ -2065,6 +2153,7 @@ def ensure_unique_offer_ids(root: ET._Element) -> int:
 
 def rebuild_categories(
     root: ET._Element,
+    offer_category_ids: list[str],
     merchant_catalog: dict[str, dict],
     source_category_names: dict[str, str],
 ) -> None:
@@ -2091,8 +2180,8 @@ def rebuild_categories(
         )
         known.add(cid)
 
-    for offer in shop.xpath(".//offers/offer"):
-        cid = child_text(offer, "categoryId")
+    # Category ids of the exported offers are collected by main(), so no second pass over offers is needed.
+    for cid in offer_category_ids:
         add_category(cid)
 
     # Keep mapped categories visible in header even when current offer slice is empty after filtering.
@@ -2117,17 +2206,45 @@ def rebuild_categories(
     shop.insert(0, categories)
 
 
-def build_rozetka_index(tree: ET._ElementTree) -> dict[str, dict[str, str]]:
+def scan_rozetka_offer(offer: ET._Element) -> tuple[str, dict[str, str]]:
+    """Resolve the offer key and price fields in one pass over the children.
+
+    Same precedence as resolve_offer_id_key: param Артикул -> vendorCode -> offer@id.
+    Only the first node of each tag is considered; old price follows OLD_PRICE_TAGS order.
+    """
+    article = ""
+    first_text: dict[str, str] = {}
+    for child in offer:
+        tag = child.tag
+        if tag == "param":
+            if not article and (child.get("name") or "").strip().casefold() == ARTICUL_KEY:
+                article = normalize_text(child.text)
+        elif tag not in first_text:
+            first_text[tag] = normalize_text(child.text)
+
+    raw_id = article or first_text.get("vendorCode") or normalize_text(offer.get("id"))
+    old_price = ""
+    for tag in OLD_PRICE_TAGS:
+        old_price = first_text.get(tag, "")
+        if old_price:
+            break
+    return normalize_key(raw_id), {
+        "price": first_text.get("price", ""),
+        "old_price": old_price,
+        "available": extract_available(offer),
+    }
+
+
+def build_rozetka_index(source: Path) -> dict[str, dict[str, str]]:
     index = {}
-    for offer in tree.xpath("//offer"):
-        key = resolve_offer_id_key(offer)
-        if not key or key in index:
-            continue
-        index[key] = {
-            "price": child_text(offer, "price"),
-            "old_price": extract_old_price(offer),
-            "available": extract_available(offer),
-        }
+    # Stream offers instead of building the whole Rozetka DOM: only three fields per offer are needed.
+    for _event, offer in ET.iterparse(str(source), events=("end",), tag="offer", huge_tree=True):
+        key, fields = scan_rozetka_offer(offer)
+        if key and key not in index:
+            index[key] = fields
+        offer.clear()
+        while offer.getprevious() is not None:
+            del offer.getparent()[0]
     return index
 
 
@@ -2148,12 +2265,12 @@ def build_gap_report(source_root: ET._Element, merchant_catalog: dict[str, dict]
     source_param_counts: dict[str, Counter[str]] = defaultdict(Counter)
     source_param_values: dict[str, dict[str, Counter[str]]] = defaultdict(lambda: defaultdict(Counter))
 
-    for offer in source_root.xpath("//offer"):
+    for offer in source_root.iter("offer"):
         source_id = child_text(offer, "categoryId")
         if not source_id:
             continue
         offers_by_source[source_id] += 1
-        for param in offer.findall("param"):
+        for param in FIND_PARAMS(offer):
             name = normalize_text(param.get("name"))
             value = compact_text(param.text or "")
             if not name or not value:
@@ -2392,12 +2509,12 @@ def build_final_template_report(
     source_param_counts: dict[str, Counter[str]] = defaultdict(Counter)
     source_param_values: dict[str, dict[str, Counter[str]]] = defaultdict(lambda: defaultdict(Counter))
 
-    for offer in source_root.xpath("//offer"):
+    for offer in source_root.iter("offer"):
         source_id = child_text(offer, "categoryId")
         if not source_id:
             continue
         offers_by_source[source_id] += 1
-        for param in offer.findall("param"):
+        for param in FIND_PARAMS(offer):
             name = normalize_text(param.get("name"))
             value = compact_text(param.text or "")
             if not name or not value:
@@ -2550,7 +2667,7 @@ def build_offer_detail_sheet(
 
     source_category_names = build_source_category_names(source_root)
 
-    for offer in source_root.xpath("//offer"):
+    for offer in source_root.iter("offer"):
         source_id = child_text(offer, "categoryId")
         target_id = SOURCE_TO_MAUDAU_CATEGORY.get(source_id, source_id)
         source_name = source_category_names.get(source_id, "")
@@ -2635,13 +2752,13 @@ def build_single_sheet_offer_report(
     source_param_values: dict[str, dict[str, str]] = defaultdict(dict)
     source_offers_present: set[str] = set()
 
-    for offer in source_root.xpath("//offer"):
+    for offer in source_root.iter("offer"):
         source_id = child_text(offer, "categoryId")
         source_name = source_category_names.get(source_id, "")
         source_offers_present.add(source_id)
 
         params: dict[str, str] = {}
-        for p in offer.findall("param"):
+        for p in FIND_PARAMS(offer):
             pname = normalize_text(p.get("name"))
             pval = compact_text(p.text or "")
             if not pname or not pval:
@@ -2977,6 +3094,65 @@ def build_single_sheet_offer_report(
     print(f"📋 Единый товарный отчет сохранен: {output_path}")
 
 
+def load_rozetka_source(sources_state: dict) -> tuple[dict[str, dict[str, str]], bool, Path | None, str]:
+    """Download and index the Rozetka feed, falling back to the local backup.
+
+    Returns (index, loaded_from_source, fallback_path, stale_alert).
+    """
+    try:
+        download_file(
+            ROZETKA_FEED_URL,
+            ROZETKA_XML,
+            "Розетка XML",
+            timeout=ROZETKA_DOWNLOAD_TIMEOUT_SEC,
+        )
+        # Parse before refreshing the backup so a truncated download never replaces a good copy.
+        rozetka_idx = build_rozetka_index(ROZETKA_XML)
+        shutil.copy2(ROZETKA_XML, ROZETKA_BACKUP_XML)
+        update_source_success(sources_state, "parserbiz", ROZETKA_XML)
+        return rozetka_idx, True, None, ""
+    except Exception as rozetka_exc:
+        backup = resolve_rozetka_backup_path()
+        if backup is None:
+            raise rozetka_exc
+        rozetka_idx = build_rozetka_index(backup)
+        if backup.resolve() != ROZETKA_BACKUP_XML.resolve():
+            shutil.copy2(backup, ROZETKA_BACKUP_XML)
+        update_source_failure(sources_state, "parserbiz")
+        print(f"⚠ Розетка недоступна, используем локальный файл: {backup}")
+        alert = stale_alert_text(sources_state, "parserbiz", "Исходник Parser.biz", backup)
+        return rozetka_idx, False, backup, alert
+
+
+def load_base_source(sources_state: dict) -> tuple[ET._ElementTree, bool, Path | None, str]:
+    """Download and parse the base feed, falling back to the local backup.
+
+    Returns (tree, loaded_from_source, fallback_path, stale_alert).
+    """
+    try:
+        download_file(
+            BASE_FEED_URL,
+            BASE_XML,
+            "Maudau XML",
+            timeout=BASE_DOWNLOAD_TIMEOUT_SEC,
+        )
+        tree = ET.parse(str(BASE_XML), FEED_PARSER)
+        shutil.copy2(BASE_XML, BASE_BACKUP_XML)
+        update_source_success(sources_state, "aquafavorit", BASE_XML)
+        return tree, True, None, ""
+    except Exception as base_exc:
+        backup = resolve_base_backup_path()
+        if backup is None:
+            raise base_exc
+        tree = ET.parse(str(backup), FEED_PARSER)
+        if backup.resolve() != BASE_BACKUP_XML.resolve():
+            shutil.copy2(backup, BASE_BACKUP_XML)
+        update_source_failure(sources_state, "aquafavorit")
+        print(f"⚠ AquaFavorit недоступен, используем локальный файл: {backup}")
+        alert = stale_alert_text(sources_state, "aquafavorit", "Исходник Aquafavorit", backup)
+        return tree, False, backup, alert
+
+
 def main() -> int:
     try:
         print("===== СТАРТ =====")
@@ -3006,66 +3182,16 @@ def main() -> int:
         if countries_list_path:
             print(f"✅ Подключен список стран Maudau (XLSX): {countries_list_path} [{len(countries_catalog)}]")
 
-        rozetka_path = ROZETKA_XML
-        rozetka_loaded_from_source = True
-        rozetka_fallback_path: Path | None = None
-        try:
-            download_file(
-                ROZETKA_FEED_URL,
-                ROZETKA_XML,
-                "Розетка XML",
-                timeout=ROZETKA_DOWNLOAD_TIMEOUT_SEC,
-            )
-            shutil.copy2(ROZETKA_XML, ROZETKA_BACKUP_XML)
-            update_source_success(sources_state, "parserbiz", ROZETKA_XML)
-        except Exception as rozetka_exc:
-            backup = resolve_rozetka_backup_path()
-            if backup is None:
-                raise rozetka_exc
-            rozetka_path = backup
-            rozetka_loaded_from_source = False
-            rozetka_fallback_path = backup
-            if backup.resolve() != ROZETKA_BACKUP_XML.resolve():
-                shutil.copy2(backup, ROZETKA_BACKUP_XML)
-            update_source_failure(sources_state, "parserbiz")
-            print(f"⚠ Розетка недоступна, используем локальный файл: {backup}")
-            alert = stale_alert_text(sources_state, "parserbiz", "Исходник Parser.biz", backup)
-            if alert:
-                stale_alerts.append(alert)
-
-        base_path = BASE_XML
-        base_loaded_from_source = True
-        base_fallback_path: Path | None = None
-        try:
-            download_file(
-                BASE_FEED_URL,
-                BASE_XML,
-                "Maudau XML",
-                timeout=BASE_DOWNLOAD_TIMEOUT_SEC,
-            )
-            shutil.copy2(BASE_XML, BASE_BACKUP_XML)
-            update_source_success(sources_state, "aquafavorit", BASE_XML)
-        except Exception as base_exc:
-            backup = resolve_base_backup_path()
-            if backup is None:
-                raise base_exc
-            base_path = backup
-            base_loaded_from_source = False
-            base_fallback_path = backup
-            if backup.resolve() != BASE_BACKUP_XML.resolve():
-                shutil.copy2(backup, BASE_BACKUP_XML)
-            update_source_failure(sources_state, "aquafavorit")
-            print(f"⚠ AquaFavorit недоступен, используем локальный файл: {backup}")
-            alert = stale_alert_text(sources_state, "aquafavorit", "Исходник Aquafavorit", backup)
-            if alert:
-                stale_alerts.append(alert)
+        # The two sources are independent, so download and parse them concurrently.
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            rozetka_future = pool.submit(load_rozetka_source, sources_state)
+            base_future = pool.submit(load_base_source, sources_state)
+            rozetka_idx, rozetka_loaded_from_source, rozetka_fallback_path, rozetka_alert = rozetka_future.result()
+            tree, base_loaded_from_source, base_fallback_path, base_alert = base_future.result()
+        stale_alerts.extend(alert for alert in (rozetka_alert, base_alert) if alert)
 
         save_sources_state(sources_state)
 
-        rozetka_tree = ET.parse(str(rozetka_path))
-        rozetka_idx = build_rozetka_index(rozetka_tree)
-
-        tree = ET.parse(str(base_path))
         root = tree.getroot()
         source_category_names = build_source_category_names(root)
 
@@ -3082,8 +3208,11 @@ def main() -> int:
         changed_category = 0
         changed_params = 0
 
-        offers = root.xpath("//offer")
-        for offer in list(offers):
+        offers = FIND_OFFERS(root)
+        offers_parent = offers[0].getparent() if offers else None
+        kept_offers: list[ET._Element] = []
+        kept_category_ids: list[str] = []
+        for offer in offers:
             source_category_id = child_text(offer, "categoryId")
             vendor = normalize_key(child_text(offer, "vendor"))
             key = resolve_offer_id_key(offer)
@@ -3091,7 +3220,6 @@ def main() -> int:
 
             keep_without_rozetka = source_category_id in KEEP_WITHOUT_ROZETKA_SOURCE_CATEGORIES
             if rz is None and vendor not in ALLOWED_VENDORS and not keep_without_rozetka:
-                offer.getparent().remove(offer)
                 removed_missing += 1
                 continue
 
@@ -3111,13 +3239,11 @@ def main() -> int:
                 source_category_names,
             )
             if not remap_ok:
-                offer.getparent().remove(offer)
                 removed_invalid += 1
                 continue
             if merchant_catalog and not target_known:
                 # Temporary safe mode: do not export offers for categories
                 # that are not yet present in MAUDAU merchant categories.
-                offer.getparent().remove(offer)
                 unresolved_target_category += 1
                 removed_unknown_target_category += 1
                 continue
@@ -3134,15 +3260,20 @@ def main() -> int:
                 brands_catalog,
                 countries_catalog,
             ):
-                offer.getparent().remove(offer)
                 removed_invalid += 1
                 continue
 
+            kept_offers.append(offer)
+            kept_category_ids.append(target_category_id)
             kept += 1
 
+        # Drop rejected offers with one slice assignment instead of per-offer removes.
+        if offers_parent is not None:
+            offers_parent[:] = kept_offers
+
         ensure_root_date(root)
         deduped_ids = ensure_unique_offer_ids(root)
-        rebuild_categories(root, merchant_catalog, source_category_names)
+        rebuild_categories(root, kept_category_ids, merchant_catalog, source_category_names)
 
         tree.write(str(OUTPUT_XML), encoding="UTF-8", xml_declaration=True, pretty_print=False)
         try:
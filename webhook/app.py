@@ -1,15 +1,30 @@
 #!/usr/bin/env python3
-import json
+import asyncio
+import logging
 import os
 import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
 from typing import Any
 
-import requests
-from fastapi import FastAPI, Header, HTTPException, Request
+import httpx
+import msgspec
+import orjson
+from fastapi import FastAPI, Request, Response
+from fastapi.responses import ORJSONResponse
+
+log = logging.getLogger(__name__)
 
 TG_TOKEN = os.environ.get("TELEGRAM_BOT_TOKEN", "")
 GH_TOKEN = os.environ.get("GH_DISPATCH_TOKEN", "")
 ALLOWED_CHAT_ID = os.environ.get("TELEGRAM_CHAT_ID", "").strip()
+# Telegram sends chat ids as ints; compare them without stringifying each update.
+_ALLOWED_CHAT_ID_INT: int | None = None
+if ALLOWED_CHAT_ID:
+    try:
+        _ALLOWED_CHAT_ID_INT = int(ALLOWED_CHAT_ID)
+    except ValueError:
+        log.warning("TELEGRAM_CHAT_ID=%r is not a numeric chat id; falling back to string comparison", ALLOWED_CHAT_ID)
 WEBHOOK_SECRET = os.environ.get("TELEGRAM_WEBHOOK_SECRET", "")
 
 FEEDS = {
@@ -29,6 +44,19 @@ FEEDS = {
     },
 }
 
+# Dispatch URL and body depend only on the feed config; build them once.
+for _feed in FEEDS.values():
+    _feed["_url"] = (
+        f"https://api.github.com/repos/{_feed['owner']}/{_feed['repo']}/actions/workflows/"
+        f"{_feed['workflow']}/dispatches"
+    )
+    _feed["_body"] = {"ref": _feed["ref"]}
+
+_GH_HEADERS = {
+    "Authorization": f"Bearer {GH_TOKEN}",
+    "Accept": "application/vnd.github+json",
+}
+
 DIRECT_FEEDS = {
     "hotline": {
         "title": "HOTLINE",
@@ -68,37 +96,111 @@ DIRECT_FEEDS = {
     },
 }
 
-app = FastAPI(title="Telegram Feed Webhook")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # One long-lived async client: keep-alive/HTTP2 pooling, and outbound calls never block the event loop.
+    app.state.http = httpx.AsyncClient(
+        http2=True,
+        timeout=httpx.Timeout(30.0, connect=5.0),
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+    )
+    # Only feeds with auth_type=api use the token; without them there is nothing to keep warm.
+    uses_api_auth = any(feed["auth_type"] == "api" for feed in DIRECT_FEEDS.values())
+    refresher = asyncio.create_task(api_token_refresher()) if uses_api_auth else None
+    # Feed dispatches run on a fixed worker pool so slow upstreams cannot pile up webhook handlers.
+    app.state.queue = asyncio.Queue(maxsize=DISPATCH_QUEUE_SIZE)
+    workers = [asyncio.create_task(dispatch_worker(app.state.queue)) for _ in range(DISPATCH_WORKERS)]
+    try:
+        yield
+    finally:
+        if refresher is not None:
+            refresher.cancel()
+        # Queued presses were already ACKed with 204 and won't be redelivered: finish them before exiting.
+        try:
+            await asyncio.wait_for(app.state.queue.join(), timeout=DISPATCH_DRAIN_TIMEOUT_SEC)
+        except asyncio.TimeoutError:
+            dropped = []
+            while not app.state.queue.empty():
+                dropped.append(app.state.queue.get_nowait()[1])
+            log.warning("Shutdown: dispatch drain timed out; cancelling in-flight jobs, dropping queued %s", dropped)
+        for worker in workers:
+            worker.cancel()
+        await app.state.http.aclose()
+
+
+app = FastAPI(title="Telegram Feed Webhook", lifespan=lifespan, default_response_class=ORJSONResponse)
 
 API_AUTH_URL = os.environ.get("API_AUTH_URL", "https://aqua-favorit.com.ua/api/auth/").strip()
 API_LOGIN = os.environ.get("API_LOGIN", "").strip()
 API_PASSWORD = os.environ.get("API_PASSWORD", "").strip()
-
-_api_token_cache: dict[str, Any] = {"token": "", "exp_ts": 0.0}
-
-
-def missing_env() -> list[str]:
-    missing: list[str] = []
-    if not TG_TOKEN:
-        missing.append("TELEGRAM_BOT_TOKEN")
-    if not GH_TOKEN:
-        missing.append("GH_DISPATCH_TOKEN")
-    return missing
-
-
-def get_api_token() -> str:
+_API_AUTH_PAYLOAD = {"login": API_LOGIN, "password": API_PASSWORD}
+_API_AUTH_HEADERS = {"Content-Type": "application/json"}
+
+# [token, exp_ts]; indexed directly on the hot path.
+_api_token: list[Any] = ["", 0.0]
+_api_token_lock = asyncio.Lock()
+API_TOKEN_RETRY_SEC = 30.0
+
+# Inline keyboard never changes, so it is serialized once.
+_KEYBOARD_JSON = orjson.dumps(
+    {
+        "inline_keyboard": [
+            [{"text": "Обновить MAUDAU", "callback_data": "run:maudau"}],
+            [{"text": "Обновить EPICENTER", "callback_data": "run:epicenter"}],
+            [{"text": "Обновить HOTLINE", "callback_data": "run_direct:hotline"}],
+            [{"text": "Обновить ROZETKA", "callback_data": "run_direct:rozetka_direct"}],
+        ]
+    }
+).decode()
+
+# Env is read once at import and never changes at runtime.
+_MISSING_ENV: tuple[str, ...] = tuple(
+    name for name, value in (("TELEGRAM_BOT_TOKEN", TG_TOKEN), ("GH_DISPATCH_TOKEN", GH_TOKEN)) if not value
+)
+_MISSING_ENV_MSG = ", ".join(_MISSING_ENV)
+
+# Short connect timeouts so an unreachable host fails fast instead of holding a webhook while
+# Telegram retries; read timeouts stay generous for slow upstream work (feed generation).
+TG_TIMEOUT = httpx.Timeout(connect=3.0, read=10.0, write=5.0, pool=1.0)
+GH_TIMEOUT = httpx.Timeout(connect=3.0, read=15.0, write=5.0, pool=1.0)
+API_AUTH_TIMEOUT = httpx.Timeout(connect=3.0, read=15.0, write=5.0, pool=1.0)
+FEED_TIMEOUT = httpx.Timeout(connect=3.0, read=55.0, write=5.0, pool=1.0)
+
+# Feed dispatch worker pool; the queue bound caps pending presses before the webhook answers 429.
+DISPATCH_WORKERS = 4
+DISPATCH_QUEUE_SIZE = 100
+# Render allows ~30s between SIGTERM and SIGKILL.
+DISPATCH_DRAIN_TIMEOUT_SEC = 25.0
+
+
+def cached_api_token() -> str:
+    token, exp_ts = _api_token
+    if token and time.time() < exp_ts:
+        return token
+    return ""
+
+
+async def get_api_token() -> str:
+    token = cached_api_token()
+    if token:
+        return token
+    # Serialize refreshes so a burst after expiry issues one auth call, not one per request.
+    async with _api_token_lock:
+        token = cached_api_token()
+        if token:
+            return token
+        return await refresh_api_token()
+
+
+async def refresh_api_token() -> str:
     now = time.time()
-    cached_token = str(_api_token_cache.get("token") or "")
-    exp_ts = float(_api_token_cache.get("exp_ts") or 0.0)
-    if cached_token and now < exp_ts:
-        return cached_token
-
     if not API_AUTH_URL or not API_LOGIN or not API_PASSWORD:
         raise RuntimeError("Missing API auth env: API_AUTH_URL/API_LOGIN/API_PASSWORD")
 
-    payload = {"login": API_LOGIN, "password": API_PASSWORD}
-    headers = {"Content-Type": "application/json"}
-    resp = requests.post(API_AUTH_URL, json=payload, headers=headers, timeout=30)
+    resp = await app.state.http.post(
+        API_AUTH_URL, json=_API_AUTH_PAYLOAD, headers=_API_AUTH_HEADERS, timeout=API_AUTH_TIMEOUT
+    )
     resp.raise_for_status()
     data = resp.json()
 
@@ -109,17 +211,30 @@ def get_api_token() -> str:
         raise RuntimeError(f"API auth failed: {msg}")
 
     # token lifetime is 600s; refresh slightly earlier.
-    _api_token_cache["token"] = token
-    _api_token_cache["exp_ts"] = now + 540
+    _api_token[0] = token
+    _api_token[1] = now + 540
     return token
 
 
-def tg_api(method: str, payload: dict[str, Any]) -> dict[str, Any]:
-    miss = missing_env()
-    if miss:
-        raise RuntimeError(f"Missing env: {', '.join(miss)}")
+async def api_token_refresher() -> None:
+    # Renew the token ~30s before expiry so requests normally hit a warm cache.
+    while True:
+        delay = _api_token[1] - time.time() - 30
+        await asyncio.sleep(max(0.0, delay))
+        try:
+            async with _api_token_lock:
+                await refresh_api_token()
+        except Exception:
+            # Request path still refreshes on demand; retry later.
+            log.exception("API token refresh failed; retrying in %.0fs", API_TOKEN_RETRY_SEC)
+            await asyncio.sleep(API_TOKEN_RETRY_SEC)
+
+
+async def tg_api(method: str, payload: dict[str, Any]) -> dict[str, Any]:
+    if _MISSING_ENV:
+        raise RuntimeError(f"Missing env: {_MISSING_ENV_MSG}")
     url = f"https://api.telegram.org/bot{TG_TOKEN}/{method}"
-    resp = requests.post(url, data=payload, timeout=30)
+    resp = await app.state.http.post(url, data=payload, timeout=TG_TIMEOUT)
     resp.raise_for_status()
     data = resp.json()
     if not data.get("ok"):
@@ -127,50 +242,30 @@ def tg_api(method: str, payload: dict[str, Any]) -> dict[str, Any]:
     return data
 
 
-def keyboard() -> str:
-    buttons = [
-        [{"text": "Обновить MAUDAU", "callback_data": "run:maudau"}],
-        [{"text": "Обновить EPICENTER", "callback_data": "run:epicenter"}],
-        [{"text": "Обновить HOTLINE", "callback_data": "run_direct:hotline"}],
-        [{"text": "Обновить ROZETKA", "callback_data": "run_direct:rozetka_direct"}],
-    ]
-    return json.dumps({"inline_keyboard": buttons}, ensure_ascii=False)
-
-
-def send_controls(chat_id: str) -> None:
-    tg_api(
+async def send_controls(chat_id: int) -> None:
+    await tg_api(
         "sendMessage",
         {
             "chat_id": chat_id,
             "text": "Выберите фид для обновления:",
-            "reply_markup": keyboard(),
+            "reply_markup": _KEYBOARD_JSON,
         },
     )
 
 
-def answer_callback(callback_id: str, text: str) -> None:
-    tg_api("answerCallbackQuery", {"callback_query_id": callback_id, "text": text, "show_alert": "false"})
+async def answer_callback(callback_id: str, text: str) -> None:
+    await tg_api("answerCallbackQuery", {"callback_query_id": callback_id, "text": text, "show_alert": "false"})
 
 
-def dispatch_workflow(feed_key: str) -> tuple[bool, str]:
-    miss = missing_env()
-    if miss:
-        return False, f"Не заданы переменные окружения: {', '.join(miss)}"
+async def dispatch_workflow(feed_key: str) -> tuple[bool, str]:
+    if _MISSING_ENV:
+        return False, f"Не заданы переменные окружения: {_MISSING_ENV_MSG}"
 
     feed = FEEDS.get(feed_key)
     if not feed:
         return False, "Неизвестная команда"
 
-    url = (
-        f"https://api.github.com/repos/{feed['owner']}/{feed['repo']}/actions/workflows/"
-        f"{feed['workflow']}/dispatches"
-    )
-    headers = {
-        "Authorization": f"Bearer {GH_TOKEN}",
-        "Accept": "application/vnd.github+json",
-    }
-    body = {"ref": feed["ref"]}
-    resp = requests.post(url, headers=headers, json=body, timeout=30)
+    resp = await app.state.http.post(feed["_url"], headers=_GH_HEADERS, json=feed["_body"], timeout=GH_TIMEOUT)
 
     if resp.status_code == 204:
         return True, f"Запущено: {feed['title']}"
@@ -182,64 +277,93 @@ def dispatch_workflow(feed_key: str) -> tuple[bool, str]:
     return False, f"Ошибка запуска {feed['title']}: {err}"
 
 
-def trigger_direct_feed(feed_key: str) -> tuple[bool, str]:
+def prepare_direct_feed(feed: dict[str, Any]) -> dict[str, Any] | None:
+    """Resolve method, headers and auth of a direct feed once; None for `api` feeds, which need a fresh token."""
+    auth_type = (feed.get("auth_type") or "none").lower()
+    if auth_type == "api":
+        return None
+
+    headers: dict[str, str] = {}
+    auth = None
+    if auth_type == "basic":
+        auth = (feed.get("basic_user") or "", feed.get("basic_pass") or "")
+    elif auth_type == "bearer":
+        token = (feed.get("bearer_token") or "").strip()
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+    elif auth_type == "header":
+        name = (feed.get("header_name") or "").strip()
+        value = (feed.get("header_value") or "").strip()
+        if name and value:
+            headers[name] = value
+    elif auth_type == "cookie":
+        cookie_str = (feed.get("cookie") or "").strip()
+        if cookie_str:
+            headers["Cookie"] = cookie_str
+
+    method = (feed.get("method") or "GET").upper()
+    if method == "POST":
+        headers.setdefault("Content-Type", "application/json")
+    else:
+        method = "GET"
+    return {"method": method, "url": feed["url"], "headers": headers, "auth": auth}
+
+
+for _direct_feed in DIRECT_FEEDS.values():
+    _direct_feed["_prepared"] = prepare_direct_feed(_direct_feed)
+
+
+async def request_api_feed(feed: dict[str, Any]) -> httpx.Response:
+    headers: dict[str, str] = {}
+    params: dict[str, Any] | None = None
+    json_body: dict[str, Any] | None = None
+
+    token = await get_api_token()
+    placement = (feed.get("api_token_placement") or "bearer").lower()
+    token_key = (feed.get("api_token_key") or "token").strip()
+
+    if placement == "bearer":
+        headers["Authorization"] = f"Bearer {token}"
+    elif placement == "header":
+        headers[token_key or "X-Auth-Token"] = token
+    elif placement == "query":
+        params = {token_key or "token": token}
+    elif placement == "body":
+        json_body = {token_key or "token": token}
+    else:
+        headers["Authorization"] = f"Bearer {token}"
+
+    body_raw = (feed.get("api_body") or "").strip()
+    if body_raw:
+        try:
+            extra = orjson.loads(body_raw)
+            if isinstance(extra, dict):
+                json_body = {**(json_body or {}), **extra}
+        except Exception:
+            pass
+
+    method = (feed.get("method") or "GET").upper()
+    if method == "POST":
+        headers.setdefault("Content-Type", "application/json")
+        return await app.state.http.post(
+            feed["url"], headers=headers, params=params, json=json_body, timeout=FEED_TIMEOUT
+        )
+    return await app.state.http.get(feed["url"], headers=headers, params=params, timeout=FEED_TIMEOUT)
+
+
+async def trigger_direct_feed(feed_key: str) -> tuple[bool, str]:
     feed = DIRECT_FEEDS.get(feed_key)
     if not feed:
         return False, "Неизвестная команда"
 
     try:
-        headers: dict[str, str] = {}
-        auth = None
-        params: dict[str, Any] | None = None
-        json_body: dict[str, Any] | None = None
-
-        auth_type = (feed.get("auth_type") or "none").lower()
-        if auth_type == "basic":
-            auth = (feed.get("basic_user") or "", feed.get("basic_pass") or "")
-        elif auth_type == "bearer":
-            token = (feed.get("bearer_token") or "").strip()
-            if token:
-                headers["Authorization"] = f"Bearer {token}"
-        elif auth_type == "header":
-            name = (feed.get("header_name") or "").strip()
-            value = (feed.get("header_value") or "").strip()
-            if name and value:
-                headers[name] = value
-        elif auth_type == "cookie":
-            cookie_str = (feed.get("cookie") or "").strip()
-            if cookie_str:
-                headers["Cookie"] = cookie_str
-        elif auth_type == "api":
-            token = get_api_token()
-            placement = (feed.get("api_token_placement") or "bearer").lower()
-            token_key = (feed.get("api_token_key") or "token").strip()
-
-            if placement == "bearer":
-                headers["Authorization"] = f"Bearer {token}"
-            elif placement == "header":
-                headers[token_key or "X-Auth-Token"] = token
-            elif placement == "query":
-                params = {token_key or "token": token}
-            elif placement == "body":
-                json_body = {token_key or "token": token}
-            else:
-                headers["Authorization"] = f"Bearer {token}"
-
-            body_raw = (feed.get("api_body") or "").strip()
-            if body_raw:
-                try:
-                    extra = json.loads(body_raw)
-                    if isinstance(extra, dict):
-                        json_body = {**(json_body or {}), **extra}
-                except Exception:
-                    pass
-
-        method = (feed.get("method") or "GET").upper()
-        if method == "POST":
-            headers.setdefault("Content-Type", "application/json")
-            resp = requests.post(feed["url"], headers=headers, auth=auth, params=params, json=json_body, timeout=60)
+        prep = feed["_prepared"]
+        if prep is not None:
+            resp = await app.state.http.request(
+                prep["method"], prep["url"], headers=prep["headers"], auth=prep["auth"], timeout=FEED_TIMEOUT
+            )
         else:
-            resp = requests.get(feed["url"], headers=headers, auth=auth, params=params, timeout=60)
+            resp = await request_api_feed(feed)
         if 200 <= resp.status_code < 300:
             return True, f"Запущено: {feed['title']}"
         return False, f"Ошибка запуска {feed['title']}: HTTP {resp.status_code}"
@@ -247,78 +371,133 @@ def trigger_direct_feed(feed_key: str) -> tuple[bool, str]:
         return False, f"Ошибка запуска {feed['title']}: {exc}"
 
 
-def is_allowed_chat(chat_id: str) -> bool:
-    if not ALLOWED_CHAT_ID:
-        return True
-    return str(chat_id) == ALLOWED_CHAT_ID
+# Full callback_data -> (handler, feed key); one lookup instead of prefix checks + split.
+_CB_HANDLERS: dict[str, tuple[Callable[[str], Awaitable[tuple[bool, str]]], str]] = {
+    "run:maudau": (dispatch_workflow, "maudau"),
+    "run:epicenter": (dispatch_workflow, "epicenter"),
+    "run_direct:hotline": (trigger_direct_feed, "hotline"),
+    "run_direct:rozetka_direct": (trigger_direct_feed, "rozetka_direct"),
+}
+
+
+# Only the update fields the bot reads; unknown fields are skipped by the decoder.
+class Chat(msgspec.Struct):
+    id: int = 0
+
+
+class Message(msgspec.Struct):
+    text: str = ""
+    chat: Chat = msgspec.field(default_factory=Chat)
+
+
+class CallbackQuery(msgspec.Struct):
+    id: str = ""
+    data: str = ""
+    message: Message = msgspec.field(default_factory=Message)
+
+
+class Update(msgspec.Struct):
+    message: Message | None = None
+    callback_query: CallbackQuery | None = None
+
+
+_UPDATE_DECODER = msgspec.json.Decoder(Update)
+
+_CMDS: frozenset[str] = frozenset({"/start", "/feeds", "/update", "start", "feeds", "update"})
+
+
+async def dispatch_worker(queue: asyncio.Queue) -> None:
+    while True:
+        handler, feed_key, chat_id, callback_id = await queue.get()
+        try:
+            try:
+                ok, text = await handler(feed_key)
+            except Exception as exc:
+                # The update is already ACKed, so the user must still hear about the failure.
+                log.exception("Dispatch of %s failed", feed_key)
+                ok, text = False, f"Ошибка запуска {feed_key}: {exc}"
+            # Both replies are independent: send them concurrently, and a stale callback must not drop the message.
+            results = await asyncio.gather(
+                answer_callback(callback_id, text if ok else "Ошибка запуска"),
+                tg_api("sendMessage", {"chat_id": chat_id, "text": text}),
+                return_exceptions=True,
+            )
+            for method, result in zip(("answerCallbackQuery", "sendMessage"), results):
+                if isinstance(result, Exception):
+                    log.error("Telegram %s failed for %s", method, feed_key, exc_info=result)
+        finally:
+            queue.task_done()
+
+
+def is_allowed_chat(chat_id: int) -> bool:
+    if _ALLOWED_CHAT_ID_INT is not None:
+        return chat_id == _ALLOWED_CHAT_ID_INT
+    return not ALLOWED_CHAT_ID or str(chat_id) == ALLOWED_CHAT_ID
 
 
 def normalize_cmd(text: str) -> str:
-    cmd = text.lower().strip()
-    if cmd.startswith("/"):
-        cmd = cmd.split()[0]
+    # Only the first word matters: split(None, 1) stops at the first whitespace run.
+    parts = text.split(None, 1)
+    if not parts:
+        return ""
+    cmd = parts[0].lower()
+    if cmd.startswith("/") and "@" in cmd:
         cmd = cmd.split("@", 1)[0]
-    else:
-        cmd = cmd.split()[0] if cmd else ""
     return cmd
 
 
 @app.get("/health")
 def health() -> dict[str, str]:
-    miss = missing_env()
-    if miss:
-        return {"status": "degraded", "missing_env": ", ".join(miss)}
+    if _MISSING_ENV:
+        return {"status": "degraded", "missing_env": _MISSING_ENV_MSG}
     return {"status": "ok"}
 
 
 @app.post("/telegram/webhook")
-async def telegram_webhook(
-    request: Request,
-    x_telegram_bot_api_secret_token: str | None = Header(default=None),
-) -> dict[str, bool]:
-    if WEBHOOK_SECRET:
-        if x_telegram_bot_api_secret_token != WEBHOOK_SECRET:
-            raise HTTPException(status_code=403, detail="invalid secret")
+async def telegram_webhook(request: Request) -> Response:
+    # Checked before the body is read, so unauthenticated calls never reach the decoder.
+    if WEBHOOK_SECRET and request.headers.get("x-telegram-bot-api-secret-token") != WEBHOOK_SECRET:
+        return ORJSONResponse({"detail": "invalid secret"}, status_code=403)
 
-    update = await request.json()
+    # Telegram only checks for a 2xx, so success paths answer with an empty 204.
+    # Decode the raw body straight into typed structs (no Starlette json wrapper, no dict walking).
+    update = _UPDATE_DECODER.decode(await request.body())
 
-    if "message" in update:
-        message = update.get("message") or {}
-        text = (message.get("text") or "").strip()
-        chat_id = str(((message.get("chat") or {}).get("id", "")))
+    if update.message is not None:
+        message = update.message
+        text = message.text.strip()
+        chat_id = message.chat.id
 
         if chat_id:
             if not is_allowed_chat(chat_id):
-                tg_api("sendMessage", {"chat_id": chat_id, "text": f"Нет доступа. chat_id={chat_id}"})
-                return {"ok": True}
+                await tg_api("sendMessage", {"chat_id": chat_id, "text": f"Нет доступа. chat_id={chat_id}"})
+                return Response(status_code=204)
 
             cmd = normalize_cmd(text)
-            if cmd in {"/start", "/feeds", "/update", "start", "feeds", "update"}:
-                send_controls(chat_id)
+            if cmd in _CMDS:
+                await send_controls(chat_id)
 
-    elif "callback_query" in update:
-        cq = update.get("callback_query") or {}
-        callback_id = cq.get("id", "")
-        data = (cq.get("data") or "").strip()
-        message = cq.get("message") or {}
-        chat_id = str(((message.get("chat") or {}).get("id", "")))
+    elif update.callback_query is not None:
+        cq = update.callback_query
+        callback_id = cq.id
+        data = cq.data.strip()
+        chat_id = cq.message.chat.id
 
         if callback_id:
             if not chat_id or not is_allowed_chat(chat_id):
-                answer_callback(callback_id, "Нет доступа")
-                return {"ok": True}
-
-            if not data.startswith("run:") and not data.startswith("run_direct:"):
-                answer_callback(callback_id, "Неизвестная команда")
-                return {"ok": True}
-
-            prefix, feed_key = data.split(":", 1)
-            if prefix == "run":
-                ok, text = dispatch_workflow(feed_key)
-            else:
-                ok, text = trigger_direct_feed(feed_key)
-
-            answer_callback(callback_id, text if ok else "Ошибка запуска")
-            tg_api("sendMessage", {"chat_id": chat_id, "text": text})
-
-    return {"ok": True}
+                await answer_callback(callback_id, "Нет доступа")
+                return Response(status_code=204)
+
+            entry = _CB_HANDLERS.get(data)
+            if entry is None:
+                await answer_callback(callback_id, "Неизвестная команда")
+                return Response(status_code=204)
+
+            handler, feed_key = entry
+            try:
+                request.app.state.queue.put_nowait((handler, feed_key, chat_id, callback_id))
+            except asyncio.QueueFull:
+                # Non-2xx makes Telegram redeliver the update later.
+                return ORJSONResponse({"detail": "dispatch queue full"}, status_code=429)
+
+    return Response(status_code=204)